@@ -1,31 +1,72 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
 from app.core.config import get_settings
-from app.db.session import get_db
+from app.db.shards import ShardRouter, get_shard_router
 from app.models.models import User
 
 settings = get_settings()
 http_bearer = HTTPBearer(auto_error=False)
 
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
-    db: Session = Depends(get_db),
-) -> User:
+
+def get_token_payload(credentials: HTTPAuthorizationCredentials = Depends(http_bearer)) -> dict:
     if not credentials:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
     try:
         payload = jwt.decode(credentials.credentials, settings.secret_key, algorithms=["HS256"])
-        user_id = int(payload.get("sub", 0))
-    except (JWTError, ValueError):
+        payload["sub"] = int(payload.get("sub", 0))
+        payload["bid"] = int(payload.get("bid", 0))
+        payload["ep"] = int(payload.get("ep", 0))
+    except (JWTError, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+    return payload
+
+
+def get_db(
+    request: Request,
+    payload: dict = Depends(get_token_payload),
+    shards: ShardRouter = Depends(get_shard_router),
+):
+    # Reads may use a cached directory entry; writes always check the primary database
+    # so they see `moving_to` as soon as a move starts.
+    safe = request.method in SAFE_METHODS
+    entry = shards.lookup(payload["bid"], cached=safe)
+    if safe and entry and entry.epoch != payload["ep"]:
+        # The cached entry may predate the move that issued this token.
+        entry = shards.lookup(payload["bid"])
+    # Moving a business reassigns user ids, so tokens from before the move must not resolve.
+    if not entry or entry.epoch != payload["ep"]:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    if entry.moving_to and request.method not in SAFE_METHODS:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Business is being migrated, retry shortly",
+            headers={"Retry-After": "30"},
+        )
 
-    user = db.get(User, user_id)
-    if not user:
+    try:
+        db = shards.session(entry.shard, business_id=entry.business_id)
+    except LookupError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Business shard is not available")
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_current_user(
+    payload: dict = Depends(get_token_payload),
+    db: Session = Depends(get_db),
+) -> User:
+    user = db.get(User, payload["sub"])
+    # Ids are only unique per shard, so the business must match as well.
+    if not user or user.business_id != payload["bid"]:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
     return user
@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.shards import ShardRouter, get_shard_router
 from app.schemas.auth import RegisterRequest, LoginRequest
 from app.services.auth_service import register_user, login_user
 
@@ -27,12 +26,12 @@ def _auth_response(message: str, user, business, token):
 
 
 @router.post("/register")
-def register(payload: RegisterRequest, db: Session = Depends(get_db)):
-    user, business, token = register_user(db, payload)
+def register(payload: RegisterRequest, shards: ShardRouter = Depends(get_shard_router)):
+    user, business, token = register_user(shards, payload)
     return _auth_response("Registration successful", user, business, token)
 
 
 @router.post("/login")
-def login(payload: LoginRequest, db: Session = Depends(get_db)):
-    user, business, token = login_user(db, payload)
+def login(payload: LoginRequest, shards: ShardRouter = Depends(get_shard_router)):
+    user, business, token = login_user(shards, payload)
     return _auth_response("Login successful", user, business, token)
@@ -1,8 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user
-from app.db.session import get_db
+from app.api.deps import get_current_user, get_db
 from app.models.models import User
 from app.services.review_service import list_reviews, get_review_stats, sync_reviews, generate_response
 
@@ -11,6 +11,8 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = 60 * 24
 
     database_url: str = "sqlite:///./fastapi_backend/aiautoreview.db"
+    shard_database_urls: dict[str, str] = {}
+    shard_directory_cache_seconds: float = 30.0
     cors_origins: list[str] = ["http://localhost:5173"]
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
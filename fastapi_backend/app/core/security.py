@@ -16,8 +16,8 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def create_access_token(subject: str) -> str:
+def create_access_token(subject: str, business_id: int, epoch: int = 0) -> str:
     expires_delta = timedelta(minutes=settings.access_token_expire_minutes)
     expire = datetime.now(timezone.utc) + expires_delta
-    payload = {"sub": subject, "exp": expire}
+    payload = {"sub": subject, "bid": business_id, "ep": epoch, "exp": expire}
     return jwt.encode(payload, settings.secret_key, algorithm="HS256")
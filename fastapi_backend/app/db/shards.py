@@ -0,0 +1,246 @@
+import time
+from bisect import bisect
+from hashlib import md5
+
+from sqlalchemy import event, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.session import Base, CatalogBase, SessionLocal, engine, make_engine, settings
+from app.models.models import Business, TenantEmail, TenantFence, TenantShard, User
+
+DEFAULT_SHARD = "default"
+
+
+class TenantMovingError(Exception):
+    pass
+
+
+@event.listens_for(Session, "before_flush")
+def _check_tenant_fence(session: Session, flush_context, instances) -> None:
+    """Refuse writes for a business that `move_tenant` has fenced on this shard.
+
+    The business row is locked first, so a move either waits for this transaction
+    to commit before fencing, or has already fenced and the check below sees it.
+    """
+    business_id = session.info.get("business_id")
+    if business_id is None or not (session.new or session.dirty or session.deleted):
+        return
+    session.execute(select(Business.id).where(Business.id == business_id).with_for_update())
+    fenced = session.scalar(select(TenantFence.business_id).where(TenantFence.business_id == business_id))
+    if fenced is not None:
+        raise TenantMovingError(business_id)
+
+
+class HashRing:
+    """Consistent hash ring used to place new businesses on a shard."""
+
+    def __init__(self, nodes: list[str], replicas: int = 64):
+        self._ring = sorted((self._hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas))
+        self._keys = [key for key, _ in self._ring]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int(md5(value.encode("utf-8")).hexdigest()[:16], 16)
+
+    def node_for(self, key: str) -> str:
+        index = bisect(self._keys, self._hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+
+class ShardRouter:
+    """Maps business ids to shard sessions.
+
+    The `tenant_shards` table in the primary database is the source of truth for
+    where a business lives; the hash ring only decides placement of new ones.
+    Business names and user emails are indexed there too, so they stay unique
+    across shards.
+    """
+
+    def __init__(self, shard_urls: dict[str, str], cache_seconds: float = 0.0):
+        engines = {settings.database_url: engine}
+        self._urls = dict(shard_urls)
+        self._cache: dict[int, tuple[float, TenantShard]] = {}
+        self.cache_seconds = cache_seconds
+        self._sessions: dict[str, sessionmaker] = {}
+        for name, url in shard_urls.items():
+            if url not in engines:
+                engines[url] = make_engine(url)
+            self._sessions[name] = sessionmaker(bind=engines[url], autoflush=False, autocommit=False, future=True)
+        self._engines = list(engines.values())
+        self.ring = HashRing(self.names)
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._sessions)
+
+    def session(self, shard: str, business_id: int | None = None) -> Session:
+        """Open a session on a shard; pass `business_id` to guard its writes with the move fence."""
+        if shard not in self._sessions:
+            raise LookupError(f"Unknown shard: {shard}")
+        db = self._sessions[shard]()
+        if business_id is not None:
+            db.info["business_id"] = business_id
+        return db
+
+    def same_database(self, shard: str, other: str) -> bool:
+        return self._urls.get(shard) == self._urls.get(other)
+
+    def lookup(self, business_id: int, cached: bool = False) -> TenantShard | None:
+        """Return the directory entry for a business.
+
+        With `cached=True` a recent entry may be served from memory. Entries of
+        businesses that are being moved are never cached.
+        """
+        if cached:
+            hit = self._cache.get(business_id)
+            if hit and hit[0] > time.monotonic():
+                return hit[1]
+
+        with SessionLocal() as catalog:
+            entry = catalog.get(TenantShard, business_id)
+        if entry and not entry.moving_to and self.cache_seconds > 0:
+            self._cache[business_id] = (time.monotonic() + self.cache_seconds, entry)
+        else:
+            self._cache.pop(business_id, None)
+        return entry
+
+    def lookup_email(self, email: str) -> TenantShard | None:
+        with SessionLocal() as catalog:
+            return catalog.scalar(
+                select(TenantShard)
+                .join(TenantEmail, TenantEmail.business_id == TenantShard.business_id)
+                .where(TenantEmail.email == email)
+            )
+
+    def allocate_business(self, business_name: str, email: str) -> tuple[int, str]:
+        """Reserve a globally unique business id, name and admin email, and pick a shard."""
+        shard = self.ring.node_for(business_name)
+        with SessionLocal() as catalog:
+            if catalog.get(TenantEmail, email):
+                raise ValueError("Email already in use")
+            if catalog.scalar(select(TenantShard.business_id).where(TenantShard.name == business_name)) is not None:
+                raise ValueError("Business name already in use")
+
+            entry = TenantShard(name=business_name, shard=shard)
+            try:
+                catalog.add(entry)
+                catalog.flush()
+                catalog.add(TenantEmail(email=email, business_id=entry.business_id))
+                catalog.commit()
+            except IntegrityError:
+                # A concurrent registration claimed the name or email first.
+                raise ValueError("Email or business name already in use")
+            return entry.business_id, shard
+
+    def release_business(self, business_id: int) -> None:
+        with SessionLocal() as catalog:
+            entry = catalog.get(TenantShard, business_id)
+            if entry:
+                catalog.query(TenantEmail).filter(TenantEmail.business_id == business_id).delete()
+                catalog.delete(entry)
+                catalog.commit()
+
+    def create_all(self) -> None:
+        CatalogBase.metadata.create_all(bind=engine)
+        for shard_engine in self._engines:
+            Base.metadata.create_all(bind=shard_engine)
+
+    def _has_businesses(self, shard: str) -> bool:
+        with self.session(shard) as db:
+            return db.scalar(select(Business.id).limit(1)) is not None
+
+    def check_directory(self) -> None:
+        """Fail fast when businesses are unregistered or routed to unconfigured shards."""
+        with SessionLocal() as catalog:
+            used = set(catalog.scalars(select(TenantShard.shard).distinct()))
+            used |= set(catalog.scalars(select(TenantShard.moving_to).where(TenantShard.moving_to.is_not(None)).distinct()))
+        if not used and any(self._has_businesses(shard) for shard in self.names):
+            raise RuntimeError(
+                "Shards hold businesses that are missing from the directory. "
+                "Run scripts/backfill_directory.py once before starting the app."
+            )
+        missing = sorted(used - set(self.names))
+        if missing:
+            raise RuntimeError(
+                f"Businesses are assigned to shards missing from SHARD_DATABASE_URLS: {', '.join(missing)}. "
+                f"Keep every existing database listed under its current name (an unsharded install uses {DEFAULT_SHARD!r})."
+            )
+
+    def backfill_directory(self, attempts: int = 3) -> int:
+        """Register businesses created before sharding so they stay routable.
+
+        Safe to run from several processes at once: if another run registers the
+        same businesses first, the directory is re-read and the work retried.
+        Raises RuntimeError when shards disagree about a business id, name or
+        email, since only one of them could be routed to.
+        """
+        for attempt in range(attempts):
+            try:
+                return self._backfill_once()
+            except IntegrityError:
+                if attempt == attempts - 1:
+                    raise
+
+    def _backfill_once(self) -> int:
+        with SessionLocal() as catalog:
+            known = set(catalog.scalars(select(TenantShard.business_id)))
+            names = {name: business_id for business_id, name in catalog.execute(select(TenantShard.business_id, TenantShard.name))}
+            emails = {email: business_id for email, business_id in catalog.execute(select(TenantEmail.email, TenantEmail.business_id))}
+            pending: dict[int, str] = {}
+            conflicts = []
+
+            for shard in self.names:
+                with self.session(shard) as db:
+                    added_here = []
+                    for business_id, business_name in db.execute(select(Business.id, Business.name)):
+                        if business_id in known:
+                            continue
+                        if business_id in pending:
+                            conflicts.append(f"business {business_id} exists on shards {pending[business_id]} and {shard}")
+                            continue
+                        if business_name in names:
+                            conflicts.append(f"business name {business_name!r} on shard {shard} is already used by business {names[business_name]}")
+                            continue
+                        pending[business_id] = shard
+                        names[business_name] = business_id
+                        added_here.append(business_id)
+                        catalog.add(TenantShard(business_id=business_id, name=business_name, shard=shard))
+                    catalog.flush()
+
+                    # Only users of newly registered businesses need their emails indexed.
+                    for i in range(0, len(added_here), 500):
+                        chunk = added_here[i:i + 500]
+                        for email, business_id in db.execute(select(User.email, User.business_id).where(User.business_id.in_(chunk))):
+                            if email in emails:
+                                conflicts.append(f"email {email!r} on shard {shard} is already used by business {emails[email]}")
+                                continue
+                            emails[email] = business_id
+                            catalog.add(TenantEmail(email=email, business_id=business_id))
+
+            if conflicts:
+                catalog.rollback()
+                raise RuntimeError("Cannot register existing businesses: " + "; ".join(conflicts))
+            catalog.commit()
+            added = len(pending)
+
+            if added and engine.dialect.name == "postgresql":
+                # Explicit ids do not advance the serial sequence used by allocate_business.
+                catalog.execute(
+                    text(
+                        "SELECT setval(pg_get_serial_sequence('tenant_shards', 'business_id'), "
+                        "MAX(business_id)) FROM tenant_shards"
+                    )
+                )
+                catalog.commit()
+        return added
+
+
+shard_router = ShardRouter(
+    settings.shard_database_urls or {DEFAULT_SHARD: settings.database_url},
+    cache_seconds=settings.shard_directory_cache_seconds,
+)
+
+
+def get_shard_router() -> ShardRouter:
+    return shard_router
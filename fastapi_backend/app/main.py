@@ -1,12 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.api.routers import auth, reviews, responses
 from app.core.config import get_settings
-from app.db.session import Base, engine
+from app.db.shards import TenantMovingError, shard_router
 
 settings = get_settings()
-Base.metadata.create_all(bind=engine)
+shard_router.create_all()
+shard_router.check_directory()
 
 app = FastAPI(title=settings.app_name)
 
@@ -19,6 +21,15 @@ app.add_middleware(
 )
 
 
+@app.exception_handler(TenantMovingError)
+def tenant_moving_handler(request: Request, exc: TenantMovingError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Business is being migrated, retry shortly"},
+        headers={"Retry-After": "30"},
+    )
+
+
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
@@ -4,7 +4,7 @@ from enum import Enum
 from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.db.session import Base
+from app.db.session import Base, CatalogBase
 
 
 class UserRole(str, Enum):
@@ -71,3 +71,30 @@ class Response(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
     review: Mapped[Review] = relationship(back_populates="response")
+
+
+class TenantFence(Base):
+    """Present on a shard while a business is being copied off it; blocks its writes."""
+
+    __tablename__ = "tenant_fences"
+
+    business_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class TenantShard(CatalogBase):
+    __tablename__ = "tenant_shards"
+
+    business_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
+    shard: Mapped[str] = mapped_column(String(64), nullable=False)
+    moving_to: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    epoch: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class TenantEmail(CatalogBase):
+    __tablename__ = "tenant_emails"
+
+    email: Mapped[str] = mapped_column(String(255), primary_key=True)
+    business_id: Mapped[int] = mapped_column(ForeignKey("tenant_shards.business_id"), index=True, nullable=False)
@@ -1,41 +1,64 @@
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
 
 from app.core.security import get_password_hash, verify_password, create_access_token
+from app.db.shards import ShardRouter
 from app.models.models import User, Business, UserRole
 from app.schemas.auth import RegisterRequest, LoginRequest
 
 
-def register_user(db: Session, payload: RegisterRequest):
-    existing_user = db.query(User).filter(User.email == payload.email).first()
-    if existing_user:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already in use")
-
-    business = Business(name=payload.business_name)
-    db.add(business)
-    db.flush()
-
-    user = User(
-        business_id=business.id,
-        name=payload.name,
-        email=payload.email,
-        hashed_password=get_password_hash(payload.password),
-        role=UserRole.admin,
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    db.refresh(business)
-
-    token = create_access_token(str(user.id))
+def _find_user(shards: ShardRouter, email: str) -> tuple[User, Business, int] | None:
+    entry = shards.lookup_email(email)
+    if not entry:
+        return None
+
+    try:
+        db = shards.session(entry.shard)
+    except LookupError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Business shard is not available")
+
+    with db:
+        user = db.query(User).filter(User.email == email, User.business_id == entry.business_id).first()
+        if not user:
+            return None
+        return user, db.get(Business, user.business_id), entry.epoch
+
+
+def register_user(shards: ShardRouter, payload: RegisterRequest):
+    try:
+        business_id, shard = shards.allocate_business(payload.business_name, payload.email)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    try:
+        with shards.session(shard) as db:
+            business = Business(id=business_id, name=payload.business_name)
+            db.add(business)
+            db.flush()
+
+            user = User(
+                business_id=business.id,
+                name=payload.name,
+                email=payload.email,
+                hashed_password=get_password_hash(payload.password),
+                role=UserRole.admin,
+            )
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+            db.refresh(business)
+    except Exception:
+        shards.release_business(business_id)
+        raise
+
+    token = create_access_token(str(user.id), business.id)
     return user, business, token
 
 
-def login_user(db: Session, payload: LoginRequest):
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.hashed_password):
+def login_user(shards: ShardRouter, payload: LoginRequest):
+    found = _find_user(shards, payload.email)
+    if not found or not verify_password(payload.password, found[0].hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    business = db.get(Business, user.business_id)
-    token = create_access_token(str(user.id))
+    user, business, epoch = found
+    token = create_access_token(str(user.id), business.id, epoch)
     return user, business, token
@@ -0,0 +1,146 @@
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.db.session import SessionLocal
+from app.db.shards import ShardRouter
+from app.models.models import Business, Review, Response, TenantFence, TenantShard, User
+
+
+def _count_tenant(db: Session, business_id: int) -> dict:
+    return {
+        "users": db.query(func.count(User.id)).filter(User.business_id == business_id).scalar() or 0,
+        "reviews": db.query(func.count(Review.id)).filter(Review.business_id == business_id).scalar() or 0,
+        "responses": (
+            db.query(func.count(Response.id))
+            .join(Review, Review.id == Response.review_id)
+            .filter(Review.business_id == business_id)
+            .scalar()
+            or 0
+        ),
+    }
+
+
+def _delete_tenant(db: Session, business_id: int) -> None:
+    review_ids = select(Review.id).where(Review.business_id == business_id)
+    db.query(Response).filter(Response.review_id.in_(review_ids)).delete(synchronize_session=False)
+    db.query(Review).filter(Review.business_id == business_id).delete(synchronize_session=False)
+    db.query(User).filter(User.business_id == business_id).delete(synchronize_session=False)
+    db.query(Business).filter(Business.id == business_id).delete(synchronize_session=False)
+    db.query(TenantFence).filter(TenantFence.business_id == business_id).delete(synchronize_session=False)
+
+
+def _fence_tenant(db: Session, business_id: int) -> None:
+    # Waits for in-flight writes holding the business row, see _check_tenant_fence.
+    db.execute(select(Business.id).where(Business.id == business_id).with_for_update())
+    db.merge(TenantFence(business_id=business_id))
+    db.commit()
+
+
+def _copy_tenant(source: Session, target: Session, business_id: int) -> dict:
+    business = source.get(Business, business_id)
+    if not business:
+        raise ValueError("Business not found on source shard")
+
+    # Leftovers from an interrupted move would otherwise be duplicated.
+    _delete_tenant(target, business_id)
+    target.add(Business(id=business.id, name=business.name, created_at=business.created_at))
+
+    # User, review and response ids are only unique per shard, so the target assigns new ones.
+    for user in source.query(User).filter(User.business_id == business_id):
+        target.add(
+            User(
+                business_id=business_id,
+                name=user.name,
+                email=user.email,
+                hashed_password=user.hashed_password,
+                role=user.role,
+                created_at=user.created_at,
+            )
+        )
+
+    reviews = source.query(Review).options(joinedload(Review.response)).filter(Review.business_id == business_id)
+    for review in reviews:
+        copy = Review(
+            business_id=business_id,
+            platform=review.platform,
+            customer_name=review.customer_name,
+            rating=review.rating,
+            sentiment=review.sentiment,
+            content=review.content,
+            review_date=review.review_date,
+        )
+        if review.response:
+            copy.response = Response(
+                response_text=review.response.response_text,
+                status=review.response.status,
+                created_at=review.response.created_at,
+            )
+        target.add(copy)
+
+    target.commit()
+    return _count_tenant(source, business_id)
+
+
+def _finish_move(business_id: int, shard: str | None) -> None:
+    with SessionLocal() as catalog:
+        entry = catalog.get(TenantShard, business_id)
+        if shard:
+            entry.shard = shard
+            entry.epoch += 1
+        entry.moving_to = None
+        catalog.commit()
+
+
+def move_tenant(shards: ShardRouter, business_id: int, target: str) -> dict:
+    """Copy a business to another shard, switch routing to it, then purge the source.
+
+    Reads keep being served from the source shard throughout. Writes are turned
+    away with 503 once `moving_to` is set, and a fence row on the source shard
+    stops writes that were already past that check: they re-check the fence in
+    their own transaction before flushing. The source is purged only once cached
+    directory entries have expired. On failure routing is left unchanged and
+    anything copied to the target is removed.
+    """
+    if target not in shards.names:
+        raise ValueError(f"Unknown shard: {target}")
+
+    with SessionLocal() as catalog:
+        entry = catalog.get(TenantShard, business_id)
+        if not entry:
+            raise ValueError("Business not found")
+        if entry.moving_to:
+            raise ValueError(f"Business is already moving to {entry.moving_to}")
+        source = entry.shard
+        if source == target:
+            return {"business_id": business_id, "source": source, "target": target, "moved": False}
+        if shards.same_database(source, target):
+            raise ValueError(f"Shards {source} and {target} share a database")
+        entry.moving_to = target
+        catalog.commit()
+
+    try:
+        with shards.session(source) as src, shards.session(target) as dst:
+            _fence_tenant(src, business_id)
+            copied = _copy_tenant(src, dst, business_id)
+            if _count_tenant(dst, business_id) != copied:
+                raise RuntimeError("Row counts on target shard do not match the source")
+        _finish_move(business_id, target)
+    except Exception:
+        with shards.session(target) as dst:
+            _delete_tenant(dst, business_id)
+            dst.commit()
+        with shards.session(source) as src:
+            src.query(TenantFence).filter(TenantFence.business_id == business_id).delete(synchronize_session=False)
+            src.commit()
+        _finish_move(business_id, None)
+        raise
+
+    # Reads can still reach the source through cached directory entries until they expire.
+    time.sleep(shards.cache_seconds)
+    with shards.session(source) as src:
+        _delete_tenant(src, business_id)
+        src.commit()
+
+    return {"business_id": business_id, "source": source, "target": target, "moved": True, **copied}
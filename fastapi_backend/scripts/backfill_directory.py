@@ -0,0 +1,10 @@
+"""Register businesses that predate sharding in the shard directory.
+
+Run once when upgrading an existing install, and again whenever a database
+that already holds businesses is added as a shard.
+"""
+from app.db.shards import shard_router
+
+shard_router.create_all()
+added = shard_router.backfill_directory()
+print(f"Registered {added} existing businesses")
@@ -0,0 +1,20 @@
+"""Move a business and all of its rows to another shard."""
+import argparse
+
+from app.db.shards import shard_router
+from app.services.shard_service import move_tenant
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("business_id", type=int)
+parser.add_argument("target_shard", choices=shard_router.names)
+args = parser.parse_args()
+
+shard_router.create_all()
+result = move_tenant(shard_router, args.business_id, args.target_shard)
+if result["moved"]:
+    print(
+        f"Moved business {result['business_id']} from {result['source']} to {result['target']}: "
+        f"{result['users']} users, {result['reviews']} reviews, {result['responses']} responses"
+    )
+else:
+    print(f"Business {result['business_id']} already lives on {result['target']}")
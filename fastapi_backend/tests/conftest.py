@@ -0,0 +1,22 @@
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Settings are read at import time, so point the app at throwaway SQLite shards first.
+_tmp = Path(tempfile.mkdtemp(prefix="aiautoreview-shards-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp / 'catalog.db'}"
+os.environ["SHARD_DATABASE_URLS"] = json.dumps({name: f"sqlite:///{_tmp / f'shard_{name}.db'}" for name in ("a", "b")})
+os.environ["SHARD_DIRECTORY_CACHE_SECONDS"] = "0"
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
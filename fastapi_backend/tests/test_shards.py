@@ -0,0 +1,244 @@
+from itertools import count
+from uuid import uuid4
+
+import pytest
+
+from app.core.security import create_access_token, get_password_hash
+from app.db.session import SessionLocal
+from app.db.shards import TenantMovingError, shard_router
+from app.models.models import Business, Review, TenantEmail, TenantFence, TenantShard, User, UserRole
+from app.services import shard_service
+from app.services.shard_service import _fence_tenant, move_tenant
+
+PASSWORD = "Password123!"
+
+
+def _business_name_on(shard: str) -> str:
+    for i in count():
+        name = f"Biz {uuid4().hex[:8]} {i}"
+        if shard_router.ring.node_for(name) == shard:
+            return name
+
+
+def _register(client, shard: str, email: str | None = None) -> dict:
+    email = email or f"{uuid4().hex[:8]}@example.com"
+    response = client.post(
+        "/api/v1/auth/register",
+        json={"name": "Owner", "email": email, "password": PASSWORD, "business_name": _business_name_on(shard)},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["data"]
+
+
+def _auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _set_moving_to(business_id: int, shard: str | None) -> None:
+    with SessionLocal() as catalog:
+        catalog.get(TenantShard, business_id).moving_to = shard
+        catalog.commit()
+
+
+def test_register_and_login_route_to_the_placed_shard(client):
+    for shard in ("a", "b"):
+        data = _register(client, shard)
+        business_id = data["business"]["id"]
+        assert shard_router.lookup(business_id).shard == shard
+
+        response = client.post("/api/v1/auth/login", json={"email": data["user"]["email"], "password": PASSWORD})
+        assert response.status_code == 200
+        assert response.json()["data"]["business"]["id"] == business_id
+
+        assert client.post("/api/v1/reviews/sync", headers=_auth(data["token"])).status_code == 200
+        stats = client.get("/api/v1/reviews/stats", headers=_auth(data["token"])).json()["data"]
+        assert stats["total_reviews"] == 5
+
+
+def test_email_is_unique_across_shards(client):
+    data = _register(client, "a")
+    response = client.post(
+        "/api/v1/auth/register",
+        json={"name": "Owner", "email": data["user"]["email"], "password": PASSWORD, "business_name": _business_name_on("b")},
+    )
+    assert response.status_code == 400
+
+
+def test_writes_are_rejected_while_moving(client):
+    data = _register(client, "a")
+    business_id = data["business"]["id"]
+    headers = _auth(data["token"])
+    shard_router.cache_seconds = 60
+    try:
+        assert client.get("/api/v1/reviews/stats", headers=headers).status_code == 200
+        _set_moving_to(business_id, "b")
+
+        assert client.get("/api/v1/reviews/stats", headers=headers).status_code == 200
+        assert client.post("/api/v1/reviews/sync", headers=headers).status_code == 503
+    finally:
+        shard_router.cache_seconds = 0
+        _set_moving_to(business_id, None)
+
+
+def test_move_rejects_tokens_issued_before_the_move(client):
+    # Give shard "a" a head start so ids assigned there differ from the ones on "b".
+    _register(client, "a")
+    data = _register(client, "b")
+    business_id = data["business"]["id"]
+    old_tokens = [data["token"]]
+    # The API cannot add users to a business yet, so insert viewers along with their catalog emails.
+    with shard_router.session("b") as db, SessionLocal() as catalog:
+        for i in range(3):
+            viewer = User(
+                business_id=business_id,
+                name=f"Viewer {i}",
+                email=f"viewer-{uuid4().hex[:8]}@example.com",
+                hashed_password=get_password_hash(PASSWORD),
+                role=UserRole.viewer,
+            )
+            catalog.add(TenantEmail(email=viewer.email, business_id=business_id))
+            catalog.commit()
+            db.add(viewer)
+            db.commit()
+            old_tokens.append(create_access_token(str(viewer.id), business_id))
+    client.post("/api/v1/reviews/sync", headers=_auth(data["token"]))
+
+    result = move_tenant(shard_router, business_id, "a")
+    assert result["moved"] and result["users"] == 4 and result["reviews"] == 5
+    assert shard_router.lookup(business_id).shard == "a"
+
+    for token in old_tokens:
+        assert client.get("/api/v1/reviews/stats", headers=_auth(token)).status_code == 401
+
+    response = client.post("/api/v1/auth/login", json={"email": data["user"]["email"], "password": PASSWORD})
+    new_token = response.json()["data"]["token"]
+    stats = client.get("/api/v1/reviews/stats", headers=_auth(new_token)).json()["data"]
+    assert stats["total_reviews"] == 5
+
+
+def test_unknown_shard_is_reported_not_crashed(client):
+    data = _register(client, "a")
+    business_id = data["business"]["id"]
+    with SessionLocal() as catalog:
+        catalog.get(TenantShard, business_id).shard = "retired"
+        catalog.commit()
+    try:
+        with pytest.raises(RuntimeError, match="retired"):
+            shard_router.check_directory()
+        assert client.get("/api/v1/reviews/stats", headers=_auth(data["token"])).status_code == 503
+        response = client.post("/api/v1/auth/login", json={"email": data["user"]["email"], "password": PASSWORD})
+        assert response.status_code == 503
+    finally:
+        with SessionLocal() as catalog:
+            catalog.get(TenantShard, business_id).shard = "a"
+            catalog.commit()
+
+
+def test_fence_stops_writes_already_in_progress(client):
+    data = _register(client, "a")
+    business_id = data["business"]["id"]
+    with shard_router.session("a", business_id=business_id) as db:
+        db.add(Review(business_id=business_id, platform="google", customer_name="Late", rating=5, content="Late write"))
+        with shard_router.session("a") as mover:
+            _fence_tenant(mover, business_id)
+        with pytest.raises(TenantMovingError):
+            db.commit()
+
+    # Requests that passed the routing check are turned away by the fence as well.
+    assert client.post("/api/v1/reviews/sync", headers=_auth(data["token"])).status_code == 503
+    assert client.get("/api/v1/reviews/stats", headers=_auth(data["token"])).json()["data"]["total_reviews"] == 0
+
+    with shard_router.session("a") as db:
+        db.query(TenantFence).filter(TenantFence.business_id == business_id).delete()
+        db.commit()
+    assert client.post("/api/v1/reviews/sync", headers=_auth(data["token"])).status_code == 200
+
+
+def test_failed_move_leaves_routing_and_source_intact(client, monkeypatch):
+    data = _register(client, "a")
+    business_id = data["business"]["id"]
+    headers = _auth(data["token"])
+    client.post("/api/v1/reviews/sync", headers=headers)
+    before = shard_router.lookup(business_id)
+
+    copy_tenant = shard_service._copy_tenant
+
+    def copy_then_fail(source, target, business_id):
+        copy_tenant(source, target, business_id)
+        raise RuntimeError("target went away")
+
+    monkeypatch.setattr(shard_service, "_copy_tenant", copy_then_fail)
+    with pytest.raises(RuntimeError, match="target went away"):
+        move_tenant(shard_router, business_id, "b")
+
+    after = shard_router.lookup(business_id)
+    assert (after.shard, after.moving_to, after.epoch) == ("a", None, before.epoch)
+    with shard_router.session("b") as db:
+        assert db.get(Business, business_id) is None
+    assert client.get("/api/v1/reviews/stats", headers=headers).json()["data"]["total_reviews"] == 5
+    assert client.post("/api/v1/reviews/sync", headers=headers).status_code == 200
+
+
+def _legacy_business(shard: str, business_id: int, name: str, email: str) -> None:
+    """Insert a business the way installs before sharding did, bypassing the directory."""
+    with shard_router.session(shard) as db:
+        db.add(Business(id=business_id, name=name))
+        db.flush()
+        db.add(User(business_id=business_id, name="Owner", email=email, hashed_password=get_password_hash(PASSWORD)))
+        db.commit()
+
+
+def _drop_legacy_business(shard: str, business_id: int) -> None:
+    with shard_router.session(shard) as db:
+        db.query(User).filter(User.business_id == business_id).delete()
+        db.query(Business).filter(Business.id == business_id).delete()
+        db.commit()
+
+
+def test_backfill_registers_existing_businesses(client):
+    email_a, email_b = f"{uuid4().hex[:8]}@legacy.com", f"{uuid4().hex[:8]}@legacy.com"
+    _legacy_business("a", 100_001, f"Legacy {uuid4().hex[:8]}", email_a)
+    _legacy_business("b", 100_002, f"Legacy {uuid4().hex[:8]}", email_b)
+
+    assert shard_router.backfill_directory() == 2
+    assert shard_router.backfill_directory() == 0
+    assert shard_router.lookup(100_001).shard == "a"
+    assert shard_router.lookup_email(email_b).business_id == 100_002
+
+    response = client.post("/api/v1/auth/login", json={"email": email_b, "password": PASSWORD})
+    assert response.status_code == 200
+    assert response.json()["data"]["business"]["id"] == 100_002
+
+
+def test_backfill_rejects_duplicate_business_id():
+    _legacy_business("a", 100_101, f"Legacy {uuid4().hex[:8]}", f"{uuid4().hex[:8]}@legacy.com")
+    _legacy_business("b", 100_101, f"Legacy {uuid4().hex[:8]}", f"{uuid4().hex[:8]}@legacy.com")
+    try:
+        with pytest.raises(RuntimeError, match="business 100101 exists on shards a and b"):
+            shard_router.backfill_directory()
+        assert shard_router.lookup(100_101) is None
+    finally:
+        _drop_legacy_business("a", 100_101)
+        _drop_legacy_business("b", 100_101)
+
+
+def test_backfill_rejects_duplicate_name(client):
+    data = _register(client, "a")
+    _legacy_business("b", 100_201, data["business"]["name"], f"{uuid4().hex[:8]}@legacy.com")
+    try:
+        with pytest.raises(RuntimeError, match="business name"):
+            shard_router.backfill_directory()
+        assert shard_router.lookup(100_201) is None
+    finally:
+        _drop_legacy_business("b", 100_201)
+
+
+def test_backfill_rejects_duplicate_email(client):
+    data = _register(client, "a")
+    _legacy_business("b", 100_301, f"Legacy {uuid4().hex[:8]}", data["user"]["email"])
+    try:
+        with pytest.raises(RuntimeError, match="email"):
+            shard_router.backfill_directory()
+        assert shard_router.lookup(100_301) is None
+    finally:
+        _drop_legacy_business("b", 100_301)